@@ -0,0 +1,31 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List
+
+def _single_threaded_opencv():
+    """
+    Run OpenCV single-threaded inside a batch worker so the worker pool
+    does not oversubscribe the cores
+    """
+    import cv2
+    cv2.setNumThreads(1)
+
+def map_images(process: Callable[[str], Any], images: List[str]) -> List[Any]:
+    """
+    Apply an image processing function to several images concurrently,
+    preserving input order
+    """
+    if len(images) <= 1:
+        return [process(image_data) for image_data in images]
+    
+    import cv2
+    opencv_threads = cv2.getNumThreads()
+    
+    # OpenCV and PIL decoding release the GIL, so threads scale across cores
+    try:
+        with ThreadPoolExecutor(max_workers=min(len(images), os.cpu_count() or 1),
+                                initializer=_single_threaded_opencv) as executor:
+            return list(executor.map(process, images))
+    finally:
+        # Some OpenCV builds apply setNumThreads process-wide
+        cv2.setNumThreads(opencv_threads)
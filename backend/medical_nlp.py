@@ -1,65 +1,130 @@
 import re
-import nltk
-import spacy
-from typing import List, Dict, Any, Tuple
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple, NamedTuple
 import numpy as np
-from collections import Counter
+from types import MappingProxyType
 
-# Download required NLTK data
-try:
-    nltk.download('punkt', quiet=True)
-    nltk.download('stopwords', quiet=True)
-    nltk.download('wordnet', quiet=True)
-except:
-    pass
+# Precompiled patterns for sentence splitting and location extraction
+_ABBREVIATION_PATTERN = re.compile(r'\b(Dr|Mr|Mrs)\.')
+_SENTENCE_BOUNDARY_PATTERN = re.compile(r'\.(?!\d)')
+_LOCATION_PATTERNS = (
+    re.compile(r'(right|left)\s+(upper|middle|lower)\s+(lobe|lung)'),
+    re.compile(r'(bilateral|both)\s+(lung|lungs)'),
+    re.compile(r'(heart|cardiac|mediastinal|pleural)')
+)
+
+# Severity label for each modifier level (index 0 unused)
+_SEVERITY_LABELS = (None, 'mild', 'moderate', 'severe')
+
+@lru_cache(maxsize=512)
+def _split_sentences(text: str) -> Tuple[str, ...]:
+    """
+    Split text into sentences, cached since each report is split by several passes
+    """
+    # Handle medical abbreviations that contain periods
+    text = _ABBREVIATION_PATTERN.sub(r'\1', text)
+    
+    # Split on periods, but be careful with decimal numbers
+    sentences = _SENTENCE_BOUNDARY_PATTERN.split(text)
+    
+    # Clean up sentences
+    return tuple(s.strip() for s in sentences if s.strip())
+
+class _ReportMetrics(NamedTuple):
+    """
+    Text metrics gathered in one pass for report quality scoring
+    """
+    word_count: int
+    sentence_count: int
+    sections: List[str]
+    medical_term_count: int
+    has_unclear_terms: bool
 
 class MedicalNLP:
     """
     Advanced Natural Language Processing for medical radiology reports
     """
     
-    def __init__(self):
-        # Medical terminology dictionaries
-        self.pathology_keywords = {
-            'pneumonia': {'severity': 'moderate', 'urgency': 'high', 'location': 'lung'},
-            'consolidation': {'severity': 'moderate', 'urgency': 'medium', 'location': 'lung'},
-            'opacity': {'severity': 'mild', 'urgency': 'low', 'location': 'lung'},
-            'infiltrate': {'severity': 'moderate', 'urgency': 'medium', 'location': 'lung'},
-            'effusion': {'severity': 'moderate', 'urgency': 'medium', 'location': 'pleural'},
-            'pneumothorax': {'severity': 'high', 'urgency': 'high', 'location': 'pleural'},
-            'fracture': {'severity': 'high', 'urgency': 'high', 'location': 'bone'},
-            'dislocation': {'severity': 'high', 'urgency': 'high', 'location': 'joint'},
-            'nodule': {'severity': 'moderate', 'urgency': 'medium', 'location': 'lung'},
-            'mass': {'severity': 'high', 'urgency': 'high', 'location': 'various'},
-            'lesion': {'severity': 'moderate', 'urgency': 'medium', 'location': 'various'},
-            'cardiomegaly': {'severity': 'moderate', 'urgency': 'medium', 'location': 'heart'},
-            'atelectasis': {'severity': 'mild', 'urgency': 'low', 'location': 'lung'}
-        }
-        
-        self.normal_indicators = [
-            'normal', 'unremarkable', 'clear', 'intact', 'stable', 
-            'no acute', 'no evidence', 'negative', 'within normal limits'
-        ]
-        
-        self.severity_modifiers = {
-            'mild': 1, 'small': 1, 'minimal': 1, 'slight': 1,
-            'moderate': 2, 'medium': 2,
-            'severe': 3, 'large': 3, 'extensive': 3, 'massive': 3,
-            'acute': 3, 'chronic': 2
+    # Medical terminology lexicons, shared read-only by all instances
+    pathology_keywords = MappingProxyType({
+        'pneumonia': {'severity': 'moderate', 'urgency': 'high', 'location': 'lung'},
+        'consolidation': {'severity': 'moderate', 'urgency': 'medium', 'location': 'lung'},
+        'opacity': {'severity': 'mild', 'urgency': 'low', 'location': 'lung'},
+        'infiltrate': {'severity': 'moderate', 'urgency': 'medium', 'location': 'lung'},
+        'effusion': {'severity': 'moderate', 'urgency': 'medium', 'location': 'pleural'},
+        'pneumothorax': {'severity': 'high', 'urgency': 'high', 'location': 'pleural'},
+        'fracture': {'severity': 'high', 'urgency': 'high', 'location': 'bone'},
+        'dislocation': {'severity': 'high', 'urgency': 'high', 'location': 'joint'},
+        'nodule': {'severity': 'moderate', 'urgency': 'medium', 'location': 'lung'},
+        'mass': {'severity': 'high', 'urgency': 'high', 'location': 'various'},
+        'lesion': {'severity': 'moderate', 'urgency': 'medium', 'location': 'various'},
+        'cardiomegaly': {'severity': 'moderate', 'urgency': 'medium', 'location': 'heart'},
+        'atelectasis': {'severity': 'mild', 'urgency': 'low', 'location': 'lung'}
+    })
+    
+    # Pathology names and their finding templates (carrying the default
+    # location and severity) as parallel tuples indexed by keyword id
+    _pathology_names = tuple(pathology_keywords)
+    _pathology_templates = tuple(
+        {
+            'type': 'pathological',
+            'finding': pathology.capitalize(),
+            'location': details['location'],
+            'severity': details['severity'],
+            'confidence': None,
+            'context': None,
+            'urgency': details['urgency']
         }
-        
-        self.anatomical_locations = [
-            'right upper lobe', 'right middle lobe', 'right lower lobe',
-            'left upper lobe', 'left lower lobe', 'bilateral',
-            'heart', 'mediastinum', 'pleural', 'costophrenic',
-            'hilum', 'apex', 'base', 'periphery'
-        ]
+        for pathology, details in pathology_keywords.items()
+    )
+    
+    normal_indicators = (
+        'normal', 'unremarkable', 'clear', 'intact', 'stable', 
+        'no acute', 'no evidence', 'negative', 'within normal limits'
+    )
+    
+    severity_modifiers = MappingProxyType({
+        'mild': 1, 'small': 1, 'minimal': 1, 'slight': 1,
+        'moderate': 2, 'medium': 2,
+        'severe': 3, 'large': 3, 'extensive': 3, 'massive': 3,
+        'acute': 3, 'chronic': 2
+    })
+    
+    # Modifiers paired with their resolved severity label, in lookup order
+    _modifier_severities = tuple(
+        (modifier, _SEVERITY_LABELS[level]) for modifier, level in severity_modifiers.items()
+    )
+    
+    anatomical_locations = (
+        'right upper lobe', 'right middle lobe', 'right lower lobe',
+        'left upper lobe', 'left lower lobe', 'bilateral',
+        'heart', 'mediastinum', 'pleural', 'costophrenic',
+        'hilum', 'apex', 'base', 'periphery'
+    )
+    
+    # Context cues that adjust finding confidence
+    descriptive_terms = frozenset(['consistent with', 'suggestive of', 'compatible with'])
+    uncertain_terms = frozenset(['possible', 'probable', 'likely', 'suspicious', 'questionable'])
+    definitive_terms = frozenset(['definite', 'clear', 'obvious', 'evident'])
+    negation_terms = frozenset(['no', 'not', 'without', 'absent', 'negative'])
+    unclear_terms = frozenset(['thing', 'stuff', 'something', 'maybe', 'perhaps'])
+    
+    # Structures that can be described as normal, in priority order
+    normal_structures = (
+        'heart', 'lungs', 'lung fields', 'mediastinum', 'bones',
+        'ribs', 'spine', 'diaphragm', 'pleura', 'cardiac silhouette'
+    )
+    
+    # Terminology counted towards report quality
+    _medical_terms = _pathology_names + (
+        'radiograph', 'ct', 'mri', 'ultrasound', 'contrast',
+        'anterior', 'posterior', 'lateral', 'medial', 'superior', 'inferior'
+    )
     
     def extract_clinical_findings(self, text: str) -> List[Dict[str, Any]]:
         """
         Extract clinical findings using advanced NLP techniques
         """
-        text_lower = text.lower()
         findings = []
         
         # Tokenize sentences
@@ -81,51 +146,45 @@ class MedicalNLP:
         
         return findings
     
-    def _split_into_sentences(self, text: str) -> List[str]:
+    def _split_into_sentences(self, text: str) -> Tuple[str, ...]:
         """
         Split text into sentences using medical-aware tokenization
         """
-        # Handle medical abbreviations that contain periods
-        text = re.sub(r'\bDr\.', 'Dr', text)
-        text = re.sub(r'\bMr\.', 'Mr', text)
-        text = re.sub(r'\bMrs\.', 'Mrs', text)
-        
-        # Split on periods, but be careful with decimal numbers
-        sentences = re.split(r'\.(?!\d)', text)
-        
-        # Clean up sentences
-        sentences = [s.strip() for s in sentences if s.strip()]
-        
-        return sentences
+        return _split_sentences(text)
     
     def _extract_pathology_from_sentence(self, sentence: str) -> List[Dict[str, Any]]:
         """
         Extract pathological findings from a single sentence
         """
-        findings = []
+        matched_ids = [
+            pathology_id for pathology_id, pathology in enumerate(self._pathology_names)
+            if pathology in sentence
+        ]
+        if not matched_ids:
+            return []
         
-        for pathology, details in self.pathology_keywords.items():
-            if pathology in sentence:
-                # Extract location
-                location = self._extract_location(sentence)
-                
-                # Extract severity modifiers
-                severity = self._extract_severity(sentence, details['severity'])
-                
-                # Calculate confidence based on context
-                confidence = self._calculate_finding_confidence(sentence, pathology)
-                
-                finding = {
-                    'type': 'pathological',
-                    'finding': pathology.capitalize(),
-                    'location': location or details['location'],
-                    'severity': severity,
-                    'confidence': confidence,
-                    'context': sentence.strip(),
-                    'urgency': details['urgency']
-                }
-                
-                findings.append(finding)
+        # Location, severity modifiers and confidence cues describe the whole
+        # sentence, so scan for them once and share them across its findings
+        location = self._extract_location(sentence)
+        severity_level = self._extract_severity(sentence, None)
+        
+        # Every matched pathology occurs in the sentence, so they share one score
+        confidence = self._calculate_finding_confidence(sentence, self._pathology_names[matched_ids[0]])
+        
+        findings = []
+        context = sentence.strip()
+        
+        for pathology_id in matched_ids:
+            template = self._pathology_templates[pathology_id]
+            finding = {
+                **template,
+                'location': location or template['location'],
+                'severity': severity_level or template['severity'],
+                'confidence': confidence,
+                'context': context
+            }
+            
+            findings.append(finding)
         
         return findings
     
@@ -133,24 +192,20 @@ class MedicalNLP:
         """
         Extract normal findings from a sentence
         """
-        findings = []
-        
+        # Only the first indicator present yields a finding
         for indicator in self.normal_indicators:
             if indicator in sentence:
                 # Extract what is normal
                 normal_structure = self._extract_normal_structure(sentence, indicator)
                 
-                finding = {
+                return [{
                     'type': 'normal',
                     'finding': f"{normal_structure} appears {indicator}",
                     'confidence': 90,
                     'context': sentence.strip()
-                }
-                
-                findings.append(finding)
-                break  # Only one normal finding per sentence
+                }]
         
-        return findings
+        return []
     
     def _extract_location(self, sentence: str) -> str:
         """
@@ -161,14 +216,8 @@ class MedicalNLP:
                 return location
         
         # Try to extract location using patterns
-        location_patterns = [
-            r'(right|left)\s+(upper|middle|lower)\s+(lobe|lung)',
-            r'(bilateral|both)\s+(lung|lungs)',
-            r'(heart|cardiac|mediastinal|pleural)'
-        ]
-        
-        for pattern in location_patterns:
-            match = re.search(pattern, sentence)
+        for pattern in _LOCATION_PATTERNS:
+            match = pattern.search(sentence)
             if match:
                 return match.group(0)
         
@@ -178,14 +227,9 @@ class MedicalNLP:
         """
         Extract severity modifiers from sentence
         """
-        for modifier, level in self.severity_modifiers.items():
+        for modifier, severity in self._modifier_severities:
             if modifier in sentence:
-                if level == 1:
-                    return 'mild'
-                elif level == 2:
-                    return 'moderate'
-                else:
-                    return 'severe'
+                return severity
         
         return default_severity
     
@@ -193,29 +237,14 @@ class MedicalNLP:
         """
         Calculate confidence score for a finding based on context
         """
-        base_confidence = 80
-        
-        # Increase confidence for specific descriptive terms
-        descriptive_terms = ['consistent with', 'suggestive of', 'compatible with']
-        if any(term in sentence for term in descriptive_terms):
-            base_confidence += 10
+        # Context flags; the negation scan only matters when the finding is present
+        has_descriptive = any(term in sentence for term in self.descriptive_terms)
+        has_uncertain = any(term in sentence for term in self.uncertain_terms)
+        has_definitive = any(term in sentence for term in self.definitive_terms)
+        is_negated = finding in sentence and any(term in sentence for term in self.negation_terms)
         
-        # Decrease confidence for uncertain terms
-        uncertain_terms = ['possible', 'probable', 'likely', 'suspicious', 'questionable']
-        if any(term in sentence for term in uncertain_terms):
-            base_confidence -= 15
-        
-        # Increase confidence for definitive terms
-        definitive_terms = ['definite', 'clear', 'obvious', 'evident']
-        if any(term in sentence for term in definitive_terms):
-            base_confidence += 15
-        
-        # Adjust based on negation
-        negation_terms = ['no', 'not', 'without', 'absent', 'negative']
-        if any(term in sentence for term in negation_terms):
-            # This might be a negative finding, adjust accordingly
-            if finding in sentence:
-                base_confidence -= 20
+        # Descriptive +10, uncertain -15, definitive +15, negated finding -20
+        base_confidence = 80 + 10 * has_descriptive - 15 * has_uncertain + 15 * has_definitive - 20 * is_negated
         
         return max(30, min(95, base_confidence))
     
@@ -224,12 +253,7 @@ class MedicalNLP:
         Extract what anatomical structure is described as normal
         """
         # Look for anatomical terms near the normal indicator
-        anatomical_terms = [
-            'heart', 'lungs', 'lung fields', 'mediastinum', 'bones',
-            'ribs', 'spine', 'diaphragm', 'pleura', 'cardiac silhouette'
-        ]
-        
-        for term in anatomical_terms:
+        for term in self.normal_structures:
             if term in sentence:
                 return term
         
@@ -239,40 +263,38 @@ class MedicalNLP:
         """
         Merge similar findings to avoid duplicates
         """
-        merged_findings = []
-        processed_findings = set()
+        merged_findings = {}
         
+        # Keep the first finding per (name, location); dicts preserve order
         for finding in findings:
-            finding_key = f"{finding['finding']}_{finding.get('location', '')}"
+            finding_key = (finding['finding'], finding.get('location', ''))
             
-            if finding_key not in processed_findings:
-                merged_findings.append(finding)
-                processed_findings.add(finding_key)
+            if finding_key not in merged_findings:
+                merged_findings[finding_key] = finding
         
-        return merged_findings
+        return list(merged_findings.values())
     
     def assess_report_quality(self, text: str) -> Dict[str, Any]:
         """
         Assess the quality of the radiology report
         """
-        # Basic metrics
-        word_count = len(text.split())
-        sentence_count = len(self._split_into_sentences(text))
-        
-        # Check for required sections
-        sections = self._identify_report_sections(text)
+        # Gather all text metrics in one pass
+        metrics = self._extract_report_metrics(text)
+        word_count = metrics.word_count
+        sentence_count = metrics.sentence_count
+        sections = metrics.sections
+        medical_term_count = metrics.medical_term_count
         
         # Calculate readability
-        readability_score = self._calculate_readability(text)
-        
-        # Check for medical terminology usage
-        medical_term_count = self._count_medical_terms(text)
+        readability_score = self._calculate_readability(word_count, sentence_count)
         
         # Assess completeness
         completeness_score = self._assess_completeness(sections, word_count)
         
         # Assess clarity
-        clarity_score = self._assess_clarity(text, sentence_count, word_count)
+        clarity_score = self._assess_clarity(
+            sentence_count, word_count, metrics.has_unclear_terms, medical_term_count
+        )
         
         # Overall quality score
         overall_score = (completeness_score + clarity_score + readability_score) / 3
@@ -289,11 +311,30 @@ class MedicalNLP:
             'assessment': self._get_quality_assessment(overall_score)
         }
     
-    def _identify_report_sections(self, text: str) -> List[str]:
+    def analyze_reports(self, texts: List[str]) -> List[Dict[str, Any]]:
         """
-        Identify sections in the radiology report
+        Assess the quality of several radiology reports in one batch
+        """
+        return [self.assess_report_quality(text) for text in texts]
+    
+    def _extract_report_metrics(self, text: str) -> _ReportMetrics:
+        """
+        Compute the word, sentence, section and terminology metrics of a report
         """
         text_lower = text.lower()
+        
+        return _ReportMetrics(
+            word_count=len(text.split()),
+            sentence_count=len(self._split_into_sentences(text)),
+            sections=self._identify_report_sections(text_lower),
+            medical_term_count=self._count_medical_terms(text_lower),
+            has_unclear_terms=any(term in text_lower for term in self.unclear_terms)
+        )
+    
+    def _identify_report_sections(self, text_lower: str) -> List[str]:
+        """
+        Identify sections in the radiology report
+        """
         sections = []
         
         section_indicators = {
@@ -309,17 +350,14 @@ class MedicalNLP:
         
         return sections
     
-    def _calculate_readability(self, text: str) -> float:
+    def _calculate_readability(self, word_count: int, sentence_count: int) -> float:
         """
         Calculate readability score (simplified)
         """
-        words = text.split()
-        sentences = self._split_into_sentences(text)
-        
-        if not sentences:
+        if not sentence_count:
             return 0
         
-        avg_words_per_sentence = len(words) / len(sentences)
+        avg_words_per_sentence = word_count / sentence_count
         
         # Medical reports should have moderate sentence length
         if 10 <= avg_words_per_sentence <= 20:
@@ -329,17 +367,11 @@ class MedicalNLP:
         else:
             return 60
     
-    def _count_medical_terms(self, text: str) -> int:
+    def _count_medical_terms(self, text_lower: str) -> int:
         """
-        Count medical terminology in the text
+        Count medical terminology in the lowercased text
         """
-        text_lower = text.lower()
-        medical_terms = list(self.pathology_keywords.keys()) + [
-            'radiograph', 'ct', 'mri', 'ultrasound', 'contrast',
-            'anterior', 'posterior', 'lateral', 'medial', 'superior', 'inferior'
-        ]
-        
-        return sum(1 for term in medical_terms if term in text_lower)
+        return sum(1 for term in self._medical_terms if term in text_lower)
     
     def _assess_completeness(self, sections: List[str], word_count: int) -> float:
         """
@@ -368,7 +400,8 @@ class MedicalNLP:
         
         return min(100, score)
     
-    def _assess_clarity(self, text: str, sentence_count: int, word_count: int) -> float:
+    def _assess_clarity(self, sentence_count: int, word_count: int,
+                        has_unclear_terms: bool, medical_term_count: int) -> float:
         """
         Assess report clarity
         """
@@ -383,12 +416,11 @@ class MedicalNLP:
                 score -= 10
         
         # Check for unclear terms
-        unclear_terms = ['thing', 'stuff', 'something', 'maybe', 'perhaps']
-        if any(term in text.lower() for term in unclear_terms):
+        if has_unclear_terms:
             score -= 15
         
         # Check for specific medical terminology
-        if self._count_medical_terms(text) >= 3:
+        if medical_term_count >= 3:
             score += 10
         
         return max(0, min(100, score))
@@ -1,30 +1,109 @@
+import os
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+
+# Optionally dispatch sklearn estimators to Intel's oneDAL kernels; off by
+# default so results stay reproducible across machines
+if os.environ.get('RADIOLOGY_USE_SKLEARNEX') == '1':
+    try:
+        from sklearnex import patch_sklearn
+        patch_sklearn()
+    except ImportError:
+        pass
+
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score
 import joblib
 import logging
+from collections import OrderedDict
 from typing import Dict, List, Any, Tuple
 import warnings
 warnings.filterwarnings('ignore')
 
 logger = logging.getLogger(__name__)
 
+# Inner class boundaries for the synthetic severity (3 classes) and quality (4 classes) scores
+_SEVERITY_BINS = np.array([0.3, 0.6])
+_QUALITY_BINS = np.array([0.25, 0.5, 0.75])
+
+def _fit_and_evaluate(model, X: np.ndarray, y: np.ndarray,
+                      run_cv: bool = False) -> Tuple[Any, Dict[str, float]]:
+    """
+    Fit one model on scaled data and score it on its own stratified split
+    """
+    # Split data
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+    
+    # Train model
+    model.fit(X_train, y_train)
+    
+    # Evaluate model
+    train_score = model.score(X_train, y_train)
+    test_score = model.score(X_test, y_test)
+    
+    scores = {
+        'train_accuracy': train_score,
+        'test_accuracy': test_score
+    }
+    
+    # Cross-validation refits the model 5 times, so it only runs for reporting
+    if run_cv:
+        cv_scores = cross_val_score(model, X_train, y_train, cv=5)
+        scores['cv_mean'] = np.mean(cv_scores)
+        scores['cv_std'] = np.std(cv_scores)
+    
+    return model, scores
+
 class RadiologyMLModels:
     """
     Machine Learning models for radiology analysis
     """
     
-    def __init__(self):
+    # Default values for missing features
+    _default_feature_values = {
+        'contrast': 50.0,
+        'brightness': 128.0,
+        'sharpness': 75.0,
+        'symmetry_score': 0.8,
+        'edge_density': 0.1,
+        'word_count': 80.0,
+        'medical_term_count': 12.0,
+        'sentence_count': 8.0,
+        'completeness_score': 80.0,
+        'clarity_score': 80.0,
+        'text_image_agreement': 0.8,
+        'finding_count_text': 3.0,
+        'finding_count_image': 3.0,
+        'confidence_variance': 10.0
+    }
+    
+    # Output formatter for each model's predictions
+    _prediction_formatters = {
+        'pathology_detector': '_format_pathology_prediction',
+        'severity_classifier': '_format_severity_prediction',
+        'quality_assessor': '_format_quality_prediction',
+        'discrepancy_detector': '_format_discrepancy_prediction'
+    }
+    
+    def __init__(self, prediction_cache_size: int = 4096):
         self.models = {}
-        self.scalers = {}
+        self.scaler = StandardScaler()
+        self.scaling_params = None
         self.label_encoders = {}
         self.feature_names = []
+        self.feature_index = {}
+        self.default_feature_vector = []
         self.is_trained = False
         
+        # LRU cache of raw (prediction, probabilities) keyed by model and feature row
+        self.prediction_cache = OrderedDict()
+        self.prediction_cache_size = prediction_cache_size
+        
         # Initialize models
         self._initialize_models()
     
@@ -39,11 +118,12 @@ class RadiologyMLModels:
                 random_state=42,
                 class_weight='balanced'
             ),
-            'severity_classifier': GradientBoostingClassifier(
-                n_estimators=100,
+            'severity_classifier': HistGradientBoostingClassifier(
+                max_iter=100,
                 learning_rate=0.1,
                 max_depth=6,
-                random_state=42
+                random_state=42,
+                early_stopping=True
             ),
             'quality_assessor': LogisticRegression(
                 random_state=42,
@@ -56,10 +136,6 @@ class RadiologyMLModels:
                 class_weight='balanced'
             )
         }
-        
-        # Initialize scalers for each model
-        for model_name in self.models.keys():
-            self.scalers[model_name] = StandardScaler()
     
     def generate_synthetic_training_data(self, n_samples: int = 1000) -> Dict[str, Any]:
         """
@@ -107,44 +183,45 @@ class RadiologyMLModels:
         Generate synthetic target variables based on features
         """
         n_samples = len(features_df)
+        columns = {name: features_df[name].to_numpy() for name in features_df.columns}
+        
+        # Each score is a weighted sum of per-sample terms, computed as one matrix-vector product
         
         # Pathology detection (binary)
-        pathology_prob = (
-            (features_df['contrast'] > 60).astype(int) * 0.3 +
-            (features_df['edge_density'] > 0.15).astype(int) * 0.4 +
-            (features_df['symmetry_score'] < 0.7).astype(int) * 0.3 +
-            np.random.normal(0, 0.1, n_samples)
-        )
+        pathology_terms = np.column_stack([
+            columns['contrast'] > 60,
+            columns['edge_density'] > 0.15,
+            columns['symmetry_score'] < 0.7
+        ])
+        pathology_prob = pathology_terms @ np.array([0.3, 0.4, 0.3]) + np.random.normal(0, 0.1, n_samples)
         pathology_labels = (pathology_prob > 0.5).astype(int)
         
         # Severity classification (0: mild, 1: moderate, 2: severe)
-        severity_score = (
-            features_df['contrast'] / 100 * 0.4 +
-            features_df['edge_density'] * 2 * 0.3 +
-            (1 - features_df['symmetry_score']) * 0.3 +
-            np.random.normal(0, 0.1, n_samples)
-        )
-        severity_labels = np.digitize(severity_score, bins=[0, 0.3, 0.6, 1.0]) - 1
-        severity_labels = np.clip(severity_labels, 0, 2)
+        severity_terms = np.column_stack([
+            columns['contrast'] / 100,
+            columns['edge_density'] * 2,
+            1 - columns['symmetry_score']
+        ])
+        severity_score = severity_terms @ np.array([0.4, 0.3, 0.3]) + np.random.normal(0, 0.1, n_samples)
+        severity_labels = np.searchsorted(_SEVERITY_BINS, severity_score, side='right')
         
         # Quality assessment (0: poor, 1: fair, 2: good, 3: excellent)
-        quality_score = (
-            features_df['sharpness'] / 100 * 0.3 +
-            features_df['contrast'] / 100 * 0.3 +
-            features_df['completeness_score'] / 100 * 0.2 +
-            features_df['clarity_score'] / 100 * 0.2 +
-            np.random.normal(0, 0.1, n_samples)
-        )
-        quality_labels = np.digitize(quality_score, bins=[0, 0.25, 0.5, 0.75, 1.0]) - 1
-        quality_labels = np.clip(quality_labels, 0, 3)
+        quality_terms = np.column_stack([
+            columns['sharpness'],
+            columns['contrast'],
+            columns['completeness_score'],
+            columns['clarity_score']
+        ])
+        quality_score = quality_terms @ (np.array([0.3, 0.3, 0.2, 0.2]) / 100) + np.random.normal(0, 0.1, n_samples)
+        quality_labels = np.searchsorted(_QUALITY_BINS, quality_score, side='right')
         
         # Discrepancy detection (binary)
-        discrepancy_prob = (
-            (np.abs(features_df['finding_count_text'] - features_df['finding_count_image']) > 1).astype(int) * 0.4 +
-            (features_df['text_image_agreement'] < 0.6).astype(int) * 0.4 +
-            (features_df['confidence_variance'] > 15).astype(int) * 0.2 +
-            np.random.normal(0, 0.1, n_samples)
-        )
+        discrepancy_terms = np.column_stack([
+            np.abs(columns['finding_count_text'] - columns['finding_count_image']) > 1,
+            columns['text_image_agreement'] < 0.6,
+            columns['confidence_variance'] > 15
+        ])
+        discrepancy_prob = discrepancy_terms @ np.array([0.4, 0.4, 0.2]) + np.random.normal(0, 0.1, n_samples)
         discrepancy_labels = (discrepancy_prob > 0.5).astype(int)
         
         return {
@@ -154,9 +231,11 @@ class RadiologyMLModels:
             'discrepancy': discrepancy_labels
         }
     
-    def train_models(self, training_data: Dict[str, Any] = None) -> Dict[str, Any]:
+    def train_models(self, training_data: Dict[str, Any] = None, n_jobs: int = 1,
+                     run_cv: bool = False) -> Dict[str, Any]:
         """
-        Train all ML models
+        Train all ML models, using up to n_jobs worker threads.
+        Cross-validation scores are only computed when run_cv is set.
         """
         if training_data is None:
             print("🔄 Generating synthetic training data...")
@@ -165,60 +244,79 @@ class RadiologyMLModels:
         features = training_data['features']
         targets = training_data['targets']
         self.feature_names = training_data['feature_names']
+        self._cache_feature_layout()
         
         training_results = {}
         
-        print("🤖 Training machine learning models...")
-        
-        # Train each model
-        for model_name, target_name in [
+        training_jobs = [
             ('pathology_detector', 'pathology'),
             ('severity_classifier', 'severity'),
             ('quality_assessor', 'quality'),
             ('discrepancy_detector', 'discrepancy')
-        ]:
+        ]
+        
+        print("🤖 Training machine learning models...")
+        for model_name, _ in training_jobs:
             print(f"  📊 Training {model_name}...")
-            
-            # Prepare data
-            X = features.values
-            y = targets[target_name]
-            
-            # Split data
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.2, random_state=42, stratify=y
-            )
-            
-            # Scale features
-            X_train_scaled = self.scalers[model_name].fit_transform(X_train)
-            X_test_scaled = self.scalers[model_name].transform(X_test)
-            
-            # Train model
-            self.models[model_name].fit(X_train_scaled, y_train)
-            
-            # Evaluate model
-            train_score = self.models[model_name].score(X_train_scaled, y_train)
-            test_score = self.models[model_name].score(X_test_scaled, y_test)
-            
-            # Cross-validation
-            cv_scores = cross_val_score(
-                self.models[model_name], X_train_scaled, y_train, cv=5
-            )
+        
+        # Scale features with a single scaler shared by all models; it only
+        # uses label-free column statistics, so it is fitted on every sample
+        X = self.scaler.fit_transform(features.values)
+        
+        # The models are independent, so they can train in parallel, each on a
+        # split stratified on its own target; the fits release the GIL, so
+        # threads avoid the start-up cost of worker processes
+        fitted = joblib.Parallel(n_jobs=min(joblib.effective_n_jobs(n_jobs), len(training_jobs)),
+                                 prefer='threads')(
+            joblib.delayed(_fit_and_evaluate)(self.models[model_name], X, targets[target_name], run_cv)
+            for model_name, target_name in training_jobs
+        )
+        
+        for (model_name, _), (model, scores) in zip(training_jobs, fitted):
+            self.models[model_name] = model
             
             training_results[model_name] = {
-                'train_accuracy': train_score,
-                'test_accuracy': test_score,
-                'cv_mean': np.mean(cv_scores),
-                'cv_std': np.std(cv_scores),
+                **scores,
                 'feature_importance': self._get_feature_importance(model_name)
             }
             
-            print(f"    ✅ {model_name}: Test Accuracy = {test_score:.3f}")
+            print(f"    ✅ {model_name}: Test Accuracy = {scores['test_accuracy']:.3f}")
         
+        self._cache_scaling_params()
+        self.prediction_cache.clear()
+        self._warm_up_models()
         self.is_trained = True
         print("🎉 All models trained successfully!")
         
         return training_results
     
+    def _cache_feature_layout(self):
+        """
+        Cache feature column positions and the default feature vector
+        """
+        self.feature_index = {
+            feature_name: i for i, feature_name in enumerate(self.feature_names)
+        }
+        self.default_feature_vector = [
+            self._default_feature_values.get(feature_name, 0.0) for feature_name in self.feature_names
+        ]
+    
+    def _cache_scaling_params(self):
+        """
+        Cache the fitted scaler's mean and scale for inference
+        """
+        self.scaling_params = (self.scaler.mean_, self.scaler.scale_)
+    
+    def _warm_up_models(self):
+        """
+        Run a throwaway prediction through each model so the first real
+        request does not pay first-call setup costs
+        """
+        # An all-zero scaled row is the training mean
+        dummy = np.zeros((1, len(self.feature_names)))
+        for model in self.models.values():
+            model.predict_proba(dummy)
+    
     def _get_feature_importance(self, model_name: str) -> Dict[str, float]:
         """
         Get feature importance for tree-based models
@@ -226,11 +324,8 @@ class RadiologyMLModels:
         model = self.models[model_name]
         
         if hasattr(model, 'feature_importances_'):
-            importance_dict = {}
-            for i, importance in enumerate(model.feature_importances_):
-                if i < len(self.feature_names):
-                    importance_dict[self.feature_names[i]] = float(importance)
-            return importance_dict
+            # zip stops at the shorter of the names and importances
+            return dict(zip(self.feature_names, model.feature_importances_.tolist()))
         else:
             return {}
     
@@ -238,17 +333,84 @@ class RadiologyMLModels:
         """
         Predict presence of pathology
         """
-        if not self.is_trained:
-            return {'error': 'Models not trained yet'}
-        
-        # Prepare features
-        feature_vector = self._prepare_feature_vector(features)
-        feature_vector_scaled = self.scalers['pathology_detector'].transform([feature_vector])
+        return self.predict_batch([features], ('pathology_detector',))[0]['pathology_detector']
+    
+    def predict_severity(self, features: Dict[str, float]) -> Dict[str, Any]:
+        """
+        Predict severity of findings
+        """
+        return self.predict_batch([features], ('severity_classifier',))[0]['severity_classifier']
+    
+    def predict_quality(self, features: Dict[str, float]) -> Dict[str, Any]:
+        """
+        Predict report/image quality
+        """
+        return self.predict_batch([features], ('quality_assessor',))[0]['quality_assessor']
+    
+    def predict_discrepancy(self, features: Dict[str, float]) -> Dict[str, Any]:
+        """
+        Predict presence of discrepancies
+        """
+        return self.predict_batch([features], ('discrepancy_detector',))[0]['discrepancy_detector']
+    
+    def predict_batch(self, features_list: List[Dict[str, float]],
+                      model_names: Tuple[str, ...] = None) -> List[Dict[str, Dict[str, Any]]]:
+        """
+        Run the selected models over a batch of feature dictionaries,
+        scaling once and predicting once per model for the whole batch
+        """
+        if model_names is None:
+            model_names = tuple(self.models.keys())
         
-        # Make prediction
-        prediction = self.models['pathology_detector'].predict(feature_vector_scaled)[0]
-        probability = self.models['pathology_detector'].predict_proba(feature_vector_scaled)[0]
+        if not self.is_trained:
+            return [
+                {model_name: {'error': 'Models not trained yet'} for model_name in model_names}
+                for _ in features_list
+            ]
+        
+        feature_matrix = self._prepare_feature_matrix(features_list)
+        feature_matrix_scaled = None
+        results = [{} for _ in features_list]
+        cache = self.prediction_cache
+        
+        for model_name in model_names:
+            keys = [(model_name, feature_vector.tobytes()) for feature_vector in feature_matrix]
+            entries = [cache.get(key) for key in keys]
+            missing = [i for i, entry in enumerate(entries) if entry is None]
+            
+            # Only rows not seen before go through the model
+            if missing:
+                model = self.models[model_name]
+                
+                # Scale the batch once for all models, with the same arithmetic
+                # as StandardScaler.transform minus its input validation
+                if feature_matrix_scaled is None:
+                    mean, scale = self.scaling_params
+                    feature_matrix_scaled = feature_matrix - mean
+                    feature_matrix_scaled /= scale
+                
+                # Predicted class is the most probable one, as in predict()
+                probabilities = model.predict_proba(feature_matrix_scaled[missing])
+                predictions = model.classes_[probabilities.argmax(axis=1)]
+                
+                for i, prediction, probability in zip(missing, predictions, probabilities):
+                    entries[i] = cache[keys[i]] = (prediction, probability.copy())
+            
+            for key in keys:
+                cache.move_to_end(key)
+            while len(cache) > self.prediction_cache_size:
+                cache.popitem(last=False)
+            
+            format_prediction = getattr(self, self._prediction_formatters[model_name])
+            for result, (prediction, probability) in zip(results, entries):
+                result[model_name] = format_prediction(prediction, probability)
         
+        return results
+    
+    def _format_pathology_prediction(self, prediction: int, probability: np.ndarray) -> Dict[str, Any]:
+        """
+        Format pathology detector output
+        """
         return {
             'has_pathology': bool(prediction),
             'confidence': float(probability[1]) if prediction else float(probability[0]),
@@ -256,19 +418,10 @@ class RadiologyMLModels:
             'probability_normal': float(probability[0])
         }
     
-    def predict_severity(self, features: Dict[str, float]) -> Dict[str, Any]:
+    def _format_severity_prediction(self, prediction: int, probabilities: np.ndarray) -> Dict[str, Any]:
         """
-        Predict severity of findings
+        Format severity classifier output
         """
-        if not self.is_trained:
-            return {'error': 'Models not trained yet'}
-        
-        feature_vector = self._prepare_feature_vector(features)
-        feature_vector_scaled = self.scalers['severity_classifier'].transform([feature_vector])
-        
-        prediction = self.models['severity_classifier'].predict(feature_vector_scaled)[0]
-        probabilities = self.models['severity_classifier'].predict_proba(feature_vector_scaled)[0]
-        
         severity_labels = ['mild', 'moderate', 'severe']
         
         return {
@@ -280,19 +433,10 @@ class RadiologyMLModels:
             }
         }
     
-    def predict_quality(self, features: Dict[str, float]) -> Dict[str, Any]:
+    def _format_quality_prediction(self, prediction: int, probabilities: np.ndarray) -> Dict[str, Any]:
         """
-        Predict report/image quality
+        Format quality assessor output
         """
-        if not self.is_trained:
-            return {'error': 'Models not trained yet'}
-        
-        feature_vector = self._prepare_feature_vector(features)
-        feature_vector_scaled = self.scalers['quality_assessor'].transform([feature_vector])
-        
-        prediction = self.models['quality_assessor'].predict(feature_vector_scaled)[0]
-        probabilities = self.models['quality_assessor'].predict_proba(feature_vector_scaled)[0]
-        
         quality_labels = ['poor', 'fair', 'good', 'excellent']
         
         return {
@@ -305,54 +449,33 @@ class RadiologyMLModels:
             }
         }
     
-    def predict_discrepancy(self, features: Dict[str, float]) -> Dict[str, Any]:
+    def _format_discrepancy_prediction(self, prediction: int, probability: np.ndarray) -> Dict[str, Any]:
         """
-        Predict presence of discrepancies
+        Format discrepancy detector output
         """
-        if not self.is_trained:
-            return {'error': 'Models not trained yet'}
-        
-        feature_vector = self._prepare_feature_vector(features)
-        feature_vector_scaled = self.scalers['discrepancy_detector'].transform([feature_vector])
-        
-        prediction = self.models['discrepancy_detector'].predict(feature_vector_scaled)[0]
-        probability = self.models['discrepancy_detector'].predict_proba(feature_vector_scaled)[0]
-        
         return {
             'has_discrepancy': bool(prediction),
             'confidence': float(probability[1]) if prediction else float(probability[0]),
             'risk_level': self._get_risk_level(probability[1])
         }
     
-    def _prepare_feature_vector(self, features: Dict[str, float]) -> List[float]:
-        """
-        Prepare feature vector from feature dictionary
-        """
-        feature_vector = []
-        
-        # Default values for missing features
-        default_values = {
-            'contrast': 50.0,
-            'brightness': 128.0,
-            'sharpness': 75.0,
-            'symmetry_score': 0.8,
-            'edge_density': 0.1,
-            'word_count': 80.0,
-            'medical_term_count': 12.0,
-            'sentence_count': 8.0,
-            'completeness_score': 80.0,
-            'clarity_score': 80.0,
-            'text_image_agreement': 0.8,
-            'finding_count_text': 3.0,
-            'finding_count_image': 3.0,
-            'confidence_variance': 10.0
-        }
-        
-        for feature_name in self.feature_names:
-            value = features.get(feature_name, default_values.get(feature_name, 0.0))
-            feature_vector.append(float(value))
-        
-        return feature_vector
+    def _prepare_feature_matrix(self, features_list: List[Dict[str, float]]) -> np.ndarray:
+        """
+        Stack feature vectors for a batch into a single matrix
+        """
+        feature_index = self.feature_index
+        rows = []
+        
+        # Start from the defaults and overwrite only the features provided
+        for features in features_list:
+            feature_vector = self.default_feature_vector.copy()
+            for feature_name, value in features.items():
+                i = feature_index.get(feature_name)
+                if i is not None:
+                    feature_vector[i] = float(value)
+            rows.append(feature_vector)
+        
+        return np.array(rows, dtype=np.float64).reshape(len(features_list), len(self.feature_names))
     
     def _get_risk_level(self, probability: float) -> str:
         """
@@ -373,29 +496,30 @@ class RadiologyMLModels:
             # Train models with synthetic data
             self.train_models()
         
-        # Get predictions from all models
-        pathology_pred = self.predict_pathology(features)
-        severity_pred = self.predict_severity(features)
-        quality_pred = self.predict_quality(features)
-        discrepancy_pred = self.predict_discrepancy(features)
+        # Get predictions from all models in a single batch pass
+        predictions = self.predict_batch([features])[0]
+        pathology_pred = predictions['pathology_detector']
+        severity_pred = predictions['severity_classifier']
+        quality_pred = predictions['quality_assessor']
+        discrepancy_pred = predictions['discrepancy_detector']
         
         # Calculate overall confidence
-        overall_confidence = np.mean([
-            pathology_pred.get('confidence', 0),
-            severity_pred.get('confidence', 0),
-            quality_pred.get('confidence', 0),
-            discrepancy_pred.get('confidence', 0)
-        ])
+        overall_confidence = (
+            pathology_pred['confidence'] +
+            severity_pred['confidence'] +
+            quality_pred['confidence'] +
+            discrepancy_pred['confidence']
+        ) / 4
         
         # Determine overall risk level
         risk_factors = []
-        if pathology_pred.get('has_pathology', False):
+        if pathology_pred['has_pathology']:
             risk_factors.append('pathology_detected')
-        if severity_pred.get('severity') == 'severe':
+        if severity_pred['severity'] == 'severe':
             risk_factors.append('severe_findings')
-        if quality_pred.get('quality') in ['poor', 'fair']:
+        if quality_pred['quality'] in ['poor', 'fair']:
             risk_factors.append('quality_issues')
-        if discrepancy_pred.get('has_discrepancy', False):
+        if discrepancy_pred['has_discrepancy']:
             risk_factors.append('discrepancies_found')
         
         overall_risk = 'high' if len(risk_factors) >= 2 else 'medium' if risk_factors else 'low'
@@ -421,21 +545,21 @@ class RadiologyMLModels:
         summary_parts = []
         
         # Pathology summary
-        if pathology.get('has_pathology', False):
+        if pathology['has_pathology']:
             summary_parts.append(f"ML models detected pathology with {pathology['confidence']:.1%} confidence")
         else:
             summary_parts.append("ML models suggest normal findings")
         
         # Severity summary
-        if severity.get('severity'):
+        if severity['severity']:
             summary_parts.append(f"Severity classified as {severity['severity']}")
         
         # Quality summary
-        if quality.get('quality'):
+        if quality['quality']:
             summary_parts.append(f"Overall quality assessed as {quality['quality']}")
         
         # Discrepancy summary
-        if discrepancy.get('has_discrepancy', False):
+        if discrepancy['has_discrepancy']:
             summary_parts.append("Potential discrepancies detected")
         
         return ". ".join(summary_parts) + "."
@@ -449,7 +573,7 @@ class RadiologyMLModels:
         
         model_data = {
             'models': self.models,
-            'scalers': self.scalers,
+            'scaler': self.scaler,
             'feature_names': self.feature_names,
             'is_trained': self.is_trained
         }
@@ -463,9 +587,26 @@ class RadiologyMLModels:
         """
         try:
             model_data = joblib.load(filepath)
+            
+            # Files from before the shared scaler hold one scaler per model
+            if 'scaler' not in model_data:
+                raise ValueError(
+                    "model file uses the old per-model 'scalers' layout; "
+                    "retrain and save the models again"
+                )
+            if set(model_data['models']) != set(self._prediction_formatters):
+                raise ValueError(
+                    f"model file holds {sorted(model_data['models'])}, "
+                    f"expected {sorted(self._prediction_formatters)}"
+                )
+            
             self.models = model_data['models']
-            self.scalers = model_data['scalers']
+            self.scaler = model_data['scaler']
             self.feature_names = model_data['feature_names']
+            self._cache_feature_layout()
+            self._cache_scaling_params()
+            self.prediction_cache.clear()
+            self._warm_up_models()
             self.is_trained = model_data['is_trained']
             print(f"✅ Models loaded from {filepath}")
         except Exception as e:
@@ -483,7 +624,7 @@ def test_ml_models():
     ml_models = RadiologyMLModels()
     
     # Train models
-    training_results = ml_models.train_models()
+    training_results = ml_models.train_models(run_cv=True)
     
     # Display training results
     print("\n📊 Training Results:")
@@ -4,38 +4,88 @@ Complete Radiology Analysis System - Python Backend
 Integrates NLP, Computer Vision, and Machine Learning for comprehensive analysis
 """
 
+import os
 import sys
 import json
 import base64
+import hashlib
+import logging
+import time
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from functools import lru_cache
+from typing import Dict, List, Any, Tuple, FrozenSet
 
 # Import our custom modules
 from main import RadiologyAnalyzer
 from medical_nlp import MedicalNLP
-from computer_vision import MedicalImageProcessor
 from ml_models import RadiologyMLModels
 
+logger = logging.getLogger(__name__)
+
+# Synonyms used when matching report findings to image findings
+_SYNONYMS = {
+    'pneumonia': ('consolidation', 'opacity', 'infiltrate'),
+    'consolidation': ('pneumonia', 'opacity'),
+    'opacity': ('consolidation', 'pneumonia', 'infiltrate'),
+    'effusion': ('fluid',),
+    'pneumothorax': ('air', 'collapse')
+}
+
+# Two findings match on a (term, synonym) pair when one mentions the term and the other the synonym
+_SYNONYM_PAIRS = tuple(
+    (term, synonym) for term, synonyms in _SYNONYMS.items() for synonym in synonyms
+)
+
+@lru_cache(maxsize=256)
+def _finding_match_keys(term: str) -> Tuple[str, FrozenSet[Tuple[str, str]], FrozenSet[Tuple[str, str]]]:
+    """
+    Precompute how a lowercased finding can match: the term itself, the
+    synonym pairs whose term it mentions and those whose synonym it mentions
+    """
+    return (
+        term,
+        frozenset(pair for pair in _SYNONYM_PAIRS if pair[0] in term),
+        frozenset(pair for pair in _SYNONYM_PAIRS if pair[1] in term)
+    )
+
 class ComprehensiveRadiologySystem:
     """
     Complete radiology analysis system integrating all components
     """
     
-    def __init__(self):
-        print("🏥 Initializing Comprehensive Radiology Analysis System")
-        print("=" * 60)
+    def __init__(self, nlp_cache_size: int = 512):
+        logger.info("Initializing Comprehensive Radiology Analysis System")
         
         # Initialize all components
         self.radiology_analyzer = RadiologyAnalyzer()
         self.nlp_processor = MedicalNLP()
-        self.image_processor = MedicalImageProcessor()
         self.ml_models = RadiologyMLModels()
         
+        # Image processor is created on the first case with images
+        self._image_processor = None
+        
+        # LRU cache of NLP results keyed by a digest of the report text
+        self.nlp_cache = OrderedDict()
+        self.nlp_cache_size = nlp_cache_size
+        
         # Train ML models
-        print("🤖 Training machine learning models...")
+        logger.info("Training machine learning models...")
         self.ml_models.train_models()
         
-        print("✅ System initialization complete!")
+        logger.info("System initialization complete")
+    
+    @property
+    def image_processor(self):
+        """
+        Computer vision processor, imported and created on first use since
+        its imaging dependencies are slow to load
+        """
+        if self._image_processor is None:
+            from computer_vision import MedicalImageProcessor
+            self._image_processor = MedicalImageProcessor()
+        
+        return self._image_processor
     
     def analyze_complete_case(self, patient_id: str, study_type: str, 
                             report_text: str, radiologist: str = "",
@@ -43,77 +93,124 @@ class ComprehensiveRadiologySystem:
         """
         Perform complete analysis of a radiology case
         """
-        analysis_start = datetime.now()
+        analysis_start = time.perf_counter()
+        analysis_timestamp = datetime.now()
         
-        print(f"\n🔬 Analyzing Case: {patient_id}")
-        print(f"Study Type: {study_type}")
-        print(f"Report Length: {len(report_text)} characters")
-        print(f"Images: {len(images) if images else 0}")
+        logger.debug("Analyzing case %s (study type %s, report length %d, images %d)",
+                     patient_id, study_type, len(report_text), len(images) if images else 0)
         
         # 1. Advanced NLP Analysis
-        print("📝 Performing advanced NLP analysis...")
-        nlp_results = self.nlp_processor.extract_clinical_findings(report_text)
-        report_quality = self.nlp_processor.assess_report_quality(report_text)
+        logger.debug("Performing advanced NLP analysis")
+        nlp_results, report_quality = self._analyze_report_text(report_text)
+        
+        # Partition findings by type once for all downstream steps
+        pathological_findings = []
+        normal_findings = []
+        for finding in nlp_results:
+            finding_type = finding.get('type')
+            if finding_type == 'pathological':
+                pathological_findings.append(finding)
+            elif finding_type == 'normal':
+                normal_findings.append(finding)
         
         # 2. Computer Vision Analysis
         image_results = []
-        all_image_features = {}
         
         if images:
-            print(f"🖼️ Processing {len(images)} medical images...")
-            for i, image_data in enumerate(images):
-                print(f"  Processing image {i+1}...")
-                img_result = self.image_processor.process_medical_image(image_data)
-                image_results.append(img_result)
-                
-                # Aggregate image features for ML
-                if img_result['success']:
-                    for key, value in img_result['features'].items():
-                        if key not in all_image_features:
-                            all_image_features[key] = []
-                        all_image_features[key].append(value)
-        
-        # Average image features
-        avg_image_features = {}
-        for key, values in all_image_features.items():
-            avg_image_features[key] = sum(values) / len(values) if values else 0
+            logger.debug("Processing %d medical images", len(images))
+            
+            # Images are independent, so process them concurrently
+            image_results = self.image_processor.process_batch(images)
+        
+        image_summary = self._summarize_image_results(image_results)
         
         # 3. Prepare features for ML analysis
         ml_features = self._prepare_ml_features(
-            nlp_results, report_quality, avg_image_features, len(images)
+            pathological_findings, report_quality, image_summary['average_features'], len(image_results)
         )
         
         # 4. Machine Learning Analysis
-        print("🤖 Running ML analysis...")
+        logger.debug("Running ML analysis")
         ml_analysis = self.ml_models.comprehensive_analysis(ml_features)
         
         # 5. Cross-modal comparison
-        print("🔄 Performing cross-modal comparison...")
+        logger.debug("Performing cross-modal comparison")
         cross_modal_analysis = self._perform_cross_modal_analysis(
-            nlp_results, image_results, ml_analysis
+            pathological_findings, image_summary['pathology_findings'], ml_analysis
         )
         
         # 6. Generate comprehensive report
         comprehensive_report = self._generate_comprehensive_report(
             patient_id, study_type, radiologist, report_text,
-            nlp_results, report_quality, image_results, 
-            ml_analysis, cross_modal_analysis, analysis_start
+            nlp_results, pathological_findings, normal_findings,
+            report_quality, image_results, image_summary,
+            ml_analysis, cross_modal_analysis, analysis_start, analysis_timestamp
         )
         
-        processing_time = (datetime.now() - analysis_start).total_seconds()
-        print(f"✅ Analysis complete in {processing_time:.2f} seconds")
+        logger.debug("Analysis complete in %.2f seconds", comprehensive_report['processing_time_seconds'])
         
         return comprehensive_report
     
-    def _prepare_ml_features(self, nlp_results: List[Dict], report_quality: Dict,
+    def _analyze_report_text(self, report_text: str) -> Tuple[List[Dict], Dict]:
+        """
+        Extract findings and assess quality for a report, reusing the
+        results when the same report text is analyzed again
+        """
+        cache_key = hashlib.blake2b(report_text.encode(), digest_size=16).digest()
+        cached = self.nlp_cache.get(cache_key)
+        
+        if cached is not None:
+            self.nlp_cache.move_to_end(cache_key)
+            return cached
+        
+        result = (
+            self.nlp_processor.extract_clinical_findings(report_text),
+            self.nlp_processor.assess_report_quality(report_text)
+        )
+        
+        self.nlp_cache[cache_key] = result
+        if len(self.nlp_cache) > self.nlp_cache_size:
+            self.nlp_cache.popitem(last=False)
+        
+        return result
+    
+    def _summarize_image_results(self, image_results: List[Dict]) -> Dict[str, Any]:
+        """
+        Collect what later steps need from the successful image results in one pass
+        """
+        feature_values = {}
+        pathology_findings = []
+        quality_scores = []
+        
+        for img_result in image_results:
+            if not img_result.get('success'):
+                continue
+            
+            # Aggregate image features for ML
+            for key, value in img_result['features'].items():
+                feature_values.setdefault(key, []).append(value)
+            
+            pathology_findings.extend(img_result.get('pathology_findings', []))
+            
+            score = img_result.get('quality_metrics', {}).get('overall_quality_score')
+            if score is not None:
+                quality_scores.append(score)
+        
+        return {
+            'average_features': {
+                key: sum(values) / len(values) for key, values in feature_values.items()
+            },
+            'pathology_findings': pathology_findings,
+            'finding_descriptions': [f['description'] for f in pathology_findings],
+            'confidences': [f.get('confidence', 0) for f in pathology_findings],
+            'quality_scores': quality_scores
+        }
+    
+    def _prepare_ml_features(self, pathological_findings: List[Dict], report_quality: Dict,
                            image_features: Dict, image_count: int) -> Dict[str, float]:
         """
         Prepare features for ML analysis
         """
-        # Text-based features
-        pathological_findings = [f for f in nlp_results if f.get('type') == 'pathological']
-        normal_findings = [f for f in nlp_results if f.get('type') == 'normal']
-        
         features = {
             # Image features (use defaults if no images)
             'contrast': image_features.get('mean_intensity', 50.0),
@@ -138,39 +235,44 @@ class ComprehensiveRadiologySystem:
         
         return features
     
-    def _perform_cross_modal_analysis(self, nlp_results: List[Dict], 
-                                    image_results: List[Dict],
+    def _perform_cross_modal_analysis(self, text_pathology: List[Dict], 
+                                    image_pathology: List[Dict],
                                     ml_analysis: Dict) -> Dict[str, Any]:
         """
-        Perform advanced cross-modal analysis
+        Perform advanced cross-modal analysis of the pathological findings
+        from the report and the images
         """
         discrepancies = []
         agreements = []
         
-        # Extract pathological findings from NLP
-        text_pathology = [f for f in nlp_results if f.get('type') == 'pathological']
-        
-        # Extract pathology from images
-        image_pathology = []
-        for img_result in image_results:
-            if img_result.get('success'):
-                image_pathology.extend(img_result.get('pathology_findings', []))
-        
-        # Compare findings
-        for text_finding in text_pathology:
-            matched = False
-            for img_finding in image_pathology:
-                if self._findings_match(text_finding, img_finding):
-                    agreements.append({
-                        'text_finding': text_finding['finding'],
-                        'image_finding': img_finding['type'],
-                        'confidence_text': text_finding['confidence'],
-                        'confidence_image': img_finding['confidence']
-                    })
-                    matched = True
-                    break
+        # Compute match keys once per finding rather than once per pair
+        text_keys = [_finding_match_keys(f['finding'].lower()) for f in text_pathology]
+        image_keys = [_finding_match_keys(f['type'].lower()) for f in image_pathology]
+        
+        # Compare findings in a single pass, recording which image findings
+        # any text finding matched so the reverse direction needs no rescan
+        image_matched = [False] * len(image_pathology)
+        
+        for text_finding, text_key in zip(text_pathology, text_keys):
+            first_match = None
+            for i, image_key in enumerate(image_keys):
+                # Once agreed, only still-unmatched image findings matter
+                if first_match is not None and image_matched[i]:
+                    continue
+                if self._findings_match(text_key, image_key):
+                    image_matched[i] = True
+                    if first_match is None:
+                        first_match = i
             
-            if not matched:
+            if first_match is not None:
+                img_finding = image_pathology[first_match]
+                agreements.append({
+                    'text_finding': text_finding['finding'],
+                    'image_finding': img_finding['type'],
+                    'confidence_text': text_finding['confidence'],
+                    'confidence_image': img_finding['confidence']
+                })
+            else:
                 discrepancies.append({
                     'type': 'false_positive',
                     'description': f"'{text_finding['finding']}' mentioned in report but not detected in images",
@@ -179,13 +281,7 @@ class ComprehensiveRadiologySystem:
                 })
         
         # Check for image findings not in text
-        for img_finding in image_pathology:
-            matched = False
-            for text_finding in text_pathology:
-                if self._findings_match(text_finding, img_finding):
-                    matched = True
-                    break
-            
+        for img_finding, matched in zip(image_pathology, image_matched):
             if not matched:
                 discrepancies.append({
                     'type': 'false_negative',
@@ -206,78 +302,68 @@ class ComprehensiveRadiologySystem:
             'cross_modal_confidence': max(0, 100 - len(discrepancies) * 15)
         }
     
-    def _findings_match(self, text_finding: Dict, image_finding: Dict) -> bool:
+    def _findings_match(self, text_keys: Tuple, image_keys: Tuple) -> bool:
         """
-        Check if text and image findings match
+        Check if text and image findings match, given their match keys
         """
-        text_term = text_finding['finding'].lower()
-        image_term = image_finding['type'].lower()
+        text_term, text_terms, text_synonyms = text_keys
+        image_term, image_terms, image_synonyms = image_keys
         
         # Direct match
         if text_term in image_term or image_term in text_term:
             return True
         
         # Synonym matching
-        synonyms = {
-            'pneumonia': ['consolidation', 'opacity', 'infiltrate'],
-            'consolidation': ['pneumonia', 'opacity'],
-            'opacity': ['consolidation', 'pneumonia', 'infiltrate'],
-            'effusion': ['fluid'],
-            'pneumothorax': ['air', 'collapse']
-        }
-        
-        for term, synonym_list in synonyms.items():
-            if term in text_term and any(syn in image_term for syn in synonym_list):
-                return True
-            if term in image_term and any(syn in text_term for syn in synonym_list):
-                return True
-        
-        return False
+        return bool(text_terms & image_synonyms or image_terms & text_synonyms)
     
     def _generate_comprehensive_report(self, patient_id: str, study_type: str,
                                      radiologist: str, report_text: str,
-                                     nlp_results: List[Dict], report_quality: Dict,
-                                     image_results: List[Dict], ml_analysis: Dict,
+                                     nlp_results: List[Dict], pathological_nlp_findings: List[Dict],
+                                     normal_nlp_findings: List[Dict], report_quality: Dict,
+                                     image_results: List[Dict], image_summary: Dict,
+                                     ml_analysis: Dict,
                                      cross_modal_analysis: Dict, 
-                                     analysis_start: datetime) -> Dict[str, Any]:
+                                     analysis_start: float,
+                                     analysis_timestamp: datetime) -> Dict[str, Any]:
         """
         Generate comprehensive analysis report
         """
-        processing_time = (datetime.now() - analysis_start).total_seconds()
+        processing_time = time.perf_counter() - analysis_start
         
         # Extract key findings
-        pathological_findings = [f['finding'] for f in nlp_results if f.get('type') == 'pathological']
-        normal_findings = [f['finding'] for f in nlp_results if f.get('type') == 'normal']
+        pathological_findings = [f['finding'] for f in pathological_nlp_findings]
+        normal_findings = [f['finding'] for f in normal_nlp_findings]
         
         # Extract image findings
-        all_image_findings = []
-        for img_result in image_results:
-            if img_result.get('success'):
-                all_image_findings.extend([
-                    f['description'] for f in img_result.get('pathology_findings', [])
-                ])
+        all_image_findings = image_summary['finding_descriptions']
+        quality_scores = image_summary['quality_scores']
+        image_confidences = image_summary['confidences']
+        
+        report_score = report_quality['overall_score']
+        
+        # Bind the ML sub-results once
+        ml_confidence = ml_analysis['overall_confidence']
+        has_pathology = ml_analysis['pathology_analysis']['has_pathology']
         
         # Calculate overall risk level
         risk_factors = []
-        if ml_analysis['pathology_analysis'].get('has_pathology'):
+        if has_pathology:
             risk_factors.append('ML detected pathology')
         if cross_modal_analysis['total_discrepancies'] > 0:
             risk_factors.append('Cross-modal discrepancies found')
-        if report_quality['overall_score'] < 70:
+        if report_score < 70:
             risk_factors.append('Report quality issues')
-        if any(img.get('quality_metrics', {}).get('overall_quality_score', 100) < 60 
-               for img in image_results if img.get('success')):
+        if quality_scores and min(quality_scores) < 60:
             risk_factors.append('Image quality issues')
         
         overall_risk = 'high' if len(risk_factors) >= 2 else 'medium' if risk_factors else 'low'
         
-        # Calculate overall confidence
-        confidences = [
-            ml_analysis['overall_confidence'],
-            cross_modal_analysis['cross_modal_confidence'] / 100,
-            report_quality['overall_score'] / 100
-        ]
-        overall_confidence = (sum(confidences) / len(confidences)) * 100
+        # Calculate overall confidence as the mean of the three sources
+        overall_confidence = round((
+            ml_confidence +
+            cross_modal_analysis['cross_modal_confidence'] / 100 +
+            report_score / 100
+        ) / 3 * 100, 1)
         
         # Generate recommendations
         recommendations = self._generate_recommendations(
@@ -289,13 +375,13 @@ class ComprehensiveRadiologySystem:
             'patient_id': patient_id,
             'study_type': study_type,
             'radiologist': radiologist,
-            'timestamp': analysis_start.isoformat(),
+            'timestamp': analysis_timestamp.isoformat(),
             'processing_time_seconds': processing_time,
             'analysis_type': 'comprehensive_python_ml',
             
             # Risk assessment
             'risk_level': overall_risk,
-            'confidence': round(overall_confidence, 1),
+            'confidence': overall_confidence,
             'risk_factors': risk_factors,
             
             # Findings
@@ -312,33 +398,35 @@ class ComprehensiveRadiologySystem:
             # Quality assessment
             'technical_quality': {
                 'report_completeness': report_quality['assessment'],
-                'report_score': report_quality['overall_score'],
-                'diagnostic_confidence': round(overall_confidence, 1),
-                'image_quality': self._get_average_image_quality(image_results)
+                'report_score': report_score,
+                'diagnostic_confidence': overall_confidence,
+                'image_quality': sum(quality_scores) / len(quality_scores) if quality_scores else None
             },
             
             # ML analysis results
             'ml_analysis': {
-                'pathology_detected': ml_analysis['pathology_analysis'].get('has_pathology', False),
-                'severity_assessment': ml_analysis['severity_analysis'].get('severity', 'unknown'),
-                'quality_assessment': ml_analysis['quality_analysis'].get('quality', 'unknown'),
-                'discrepancy_risk': ml_analysis['discrepancy_analysis'].get('risk_level', 'low'),
-                'ml_confidence': ml_analysis['overall_confidence']
+                'pathology_detected': has_pathology,
+                'severity_assessment': ml_analysis['severity_analysis']['severity'],
+                'quality_assessment': ml_analysis['quality_analysis']['quality'],
+                'discrepancy_risk': ml_analysis['discrepancy_analysis']['risk_level'],
+                'ml_confidence': ml_confidence
             },
             
             # Detailed metrics
             'ml_metrics': {
-                'text_analysis_confidence': report_quality['overall_score'],
-                'image_analysis_confidence': self._get_average_image_confidence(image_results),
+                'text_analysis_confidence': report_score,
+                'image_analysis_confidence': (
+                    sum(image_confidences) / len(image_confidences) if image_confidences else 0
+                ),
                 'cross_modal_agreement': cross_modal_analysis['agreement_percentage'],
-                'ml_model_confidence': ml_analysis['overall_confidence'] * 100
+                'ml_model_confidence': ml_confidence * 100
             },
             
             # Recommendations and summary
             'recommendations': recommendations,
             'potential_false_findings': self._format_false_findings(cross_modal_analysis),
             'summary': self._generate_executive_summary(
-                pathological_findings, all_image_findings, cross_modal_analysis, ml_analysis
+                pathological_findings, all_image_findings, cross_modal_analysis, has_pathology
             ),
             
             # Processing details
@@ -355,10 +443,10 @@ class ComprehensiveRadiologySystem:
         recommendations = []
         
         # ML-based recommendations
-        if ml_analysis['pathology_analysis'].get('has_pathology'):
+        if ml_analysis['pathology_analysis']['has_pathology']:
             recommendations.append("ML models suggest pathology present - clinical correlation recommended")
         
-        if ml_analysis['severity_analysis'].get('severity') == 'severe':
+        if ml_analysis['severity_analysis']['severity'] == 'severe':
             recommendations.append("Severe findings detected - urgent clinical review recommended")
         
         # Cross-modal recommendations
@@ -398,31 +486,6 @@ class ComprehensiveRadiologySystem:
         else:
             return f"Significant discrepancies between image and text findings ({agreement_pct:.1f}% agreement). {discrepancy_count} major discrepancies detected - comprehensive review required."
     
-    def _get_average_image_quality(self, image_results: List[Dict]) -> Optional[float]:
-        """
-        Get average image quality score
-        """
-        quality_scores = []
-        for img_result in image_results:
-            if img_result.get('success'):
-                score = img_result.get('quality_metrics', {}).get('overall_quality_score')
-                if score is not None:
-                    quality_scores.append(score)
-        
-        return sum(quality_scores) / len(quality_scores) if quality_scores else None
-    
-    def _get_average_image_confidence(self, image_results: List[Dict]) -> float:
-        """
-        Get average confidence from image analysis
-        """
-        confidences = []
-        for img_result in image_results:
-            if img_result.get('success'):
-                for finding in img_result.get('pathology_findings', []):
-                    confidences.append(finding.get('confidence', 0))
-        
-        return sum(confidences) / len(confidences) if confidences else 0
-    
     def _format_false_findings(self, cross_modal_analysis: Dict) -> List[Dict]:
         """
         Format potential false findings
@@ -442,7 +505,7 @@ class ComprehensiveRadiologySystem:
     
     def _generate_executive_summary(self, pathological_findings: List[str],
                                   image_findings: List[str], cross_modal_analysis: Dict,
-                                  ml_analysis: Dict) -> str:
+                                  has_pathology: bool) -> str:
         """
         Generate executive summary
         """
@@ -460,7 +523,7 @@ class ComprehensiveRadiologySystem:
             summary_parts.append("No obvious abnormalities detected in images")
         
         # ML summary
-        if ml_analysis['pathology_analysis'].get('has_pathology'):
+        if has_pathology:
             summary_parts.append("ML models confirm pathology presence")
         else:
             summary_parts.append("ML models suggest normal findings")
@@ -478,6 +541,9 @@ def main():
     """
     Main function demonstrating the comprehensive system
     """
+    # main.py configures logging on import, so force the level chosen here
+    logging.basicConfig(level=os.environ.get('LOGLEVEL', 'INFO').upper(), force=True)
+    
     print("🏥 Comprehensive Radiology Analysis System")
     print("🐍 Python-Powered AI Backend")
     print("=" * 60)